@@ -1,36 +1,150 @@
 import os
+import atexit
+import json
 import logging
+import queue
+import random
+import socket
 import time
+from http import HTTPStatus
+from email.utils import parsedate_to_datetime
+from logging.handlers import QueueHandler, QueueListener
+from pathlib import Path
+from typing import Iterable, Iterator, Mapping, Optional
+
 import requests
 from dotenv import load_dotenv
+from requests.adapters import HTTPAdapter
 from telebot import TeleBot
 import sys
 
-# Настройка логирования
+try:
+    import orjson
+    json_loads = orjson.loads
+except ImportError:  # orjson необязателен: используем стандартный json
+    json_loads = json.loads
+
+# Загрузка переменных окружения
+load_dotenv()
+
+# Настройка логирования: запись в stdout выполняется в отдельном потоке
 logger = logging.getLogger(__name__)
-logger.setLevel(logging.DEBUG)
+log_level = os.getenv('LOG_LEVEL', 'INFO').upper()
+# getLevelName возвращает число только для известных уровней
+level = logging.getLevelName(log_level)
+logger.setLevel(level if isinstance(level, int) else logging.INFO)
 handler = logging.StreamHandler(sys.stdout)
 handler.setFormatter(
     logging.Formatter('%(asctime)s [%(levelname)s] %(message)s')
 )
-logger.addHandler(handler)
-
-# Загрузка переменных окружения
-load_dotenv()
+log_queue = queue.SimpleQueue()
+logger.addHandler(QueueHandler(log_queue))
+log_listener = QueueListener(log_queue, handler)
+log_listener.start()
+atexit.register(log_listener.stop)
+if not isinstance(level, int):
+    logger.warning(
+        'Неизвестный уровень логирования LOG_LEVEL=%s, используется INFO.',
+        log_level
+    )
 
 PRACTICUM_TOKEN = os.getenv('PRACTICUM_TOKEN')
 TELEGRAM_TOKEN = os.getenv('TELEGRAM_TOKEN')
 TELEGRAM_CHAT_ID = os.getenv('TELEGRAM_CHAT_ID')
 RETRY_PERIOD = 600  # Период повторных попыток в секундах
+BASE_DELAY = 1.0  # Начальная задержка после сбоя запроса в секундах
+MAX_DELAY = 30.0  # Верхняя граница задержки после сбоя в секундах
+MAX_RETRIES = 5  # Количество ускоренных повторов до возврата к RETRY_PERIOD
+ERROR_TTL = 3600  # Интервал, в течение которого ошибка не дублируется
+SENT_KEY_TTL = 24 * 60 * 60  # Срок хранения ключей отправленных статусов
+STALE_THRESHOLD = 30 * 60  # Длительность сбоя API до отправки сводки
 ENDPOINT = 'https://practicum.yandex.ru/api/user_api/homework_statuses/'
 HEADERS = {'Authorization': f'OAuth {PRACTICUM_TOKEN}'}
+STATE_FILE = Path(
+    os.getenv('HOMEWORK_BOT_STATE', '~/.homework_bot_state')
+).expanduser()
+API_TIMEOUT = (5, 30)  # Таймауты подключения и чтения в секундах
+API_ERROR_TEXT_LIMIT = 500  # Сколько символов ответа API включать в ошибку
+TELEGRAM_TIMEOUT = 10  # Таймаут отправки сообщения в Telegram в секундах
+MESSAGE_LENGTH_LIMIT = 4000  # С запасом до лимита Telegram в 4096 символов
+MESSAGE_SEPARATOR = '\n\n'
 
 # Определение статусов домашних работ
 HOMEWORK_VERDICTS = {
-    'approved': 'Работа проверена: ревьюеру всё понравилось. Ура!',
-    'reviewing': 'Работа взята на проверку ревьюером.',
-    'rejected': 'Работа проверена: у ревьюера есть замечания.'
+    sys.intern('approved'): 'Работа проверена: ревьюеру всё понравилось. Ура!',
+    sys.intern('reviewing'): 'Работа взята на проверку ревьюером.',
+    sys.intern('rejected'): 'Работа проверена: у ревьюера есть замечания.'
 }
+STATUS_MESSAGE_TEMPLATE = 'Изменился статус проверки работы "{}". {}'
+
+# Валидаторы полностью обработанного ответа API для условных запросов
+_cache_validators: dict[str, str] = {}
+
+# Валидаторы последнего полученного ответа, ещё не обработанного ботом
+_received_validators: dict[str, str] = {}
+
+# Время последней отправки уведомления для каждой сигнатуры ошибки
+_error_cache: dict[str, float] = {}
+
+# Время отправки уведомления для каждой версии статуса работы
+_sent_keys: dict[tuple, float] = {}
+
+# Последнее известное состояние каждой домашней работы
+_last_known: dict[object, dict] = {}
+
+# Начало сбоя API, о котором уже отправлено последнее известное состояние
+_stale_reported_for: Optional[float] = None
+
+
+class APIError(Exception):
+    """Сбой при запросе к API Практикума."""
+
+    def __init__(self, message: str, status: Optional[int] = None):
+        """Сохраняет код ответа API, если он был получен."""
+        super().__init__(message)
+        self.status = status
+
+
+class TransientAPIError(APIError):
+    """Временный сбой API: запрос стоит повторить позже."""
+
+    def __init__(
+        self,
+        message: str,
+        status: Optional[int] = None,
+        retry_after: Optional[float] = None
+    ):
+        """Сохраняет рекомендованную сервером задержку перед повтором."""
+        super().__init__(message, status)
+        self.retry_after = retry_after
+
+
+class PermanentAPIError(APIError):
+    """Сбой API, который не исправится повтором запроса."""
+
+
+class KeepAliveAdapter(HTTPAdapter):
+    """HTTP-адаптер с TCP_NODELAY и SO_KEEPALIVE на новых соединениях."""
+
+    socket_options = [
+        (socket.IPPROTO_TCP, socket.TCP_NODELAY, 1),
+        (socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1),
+    ]
+
+    def init_poolmanager(self, *args, **kwargs) -> None:
+        """Передаёт параметры сокетов в пул соединений."""
+        kwargs['socket_options'] = self.socket_options
+        super().init_poolmanager(*args, **kwargs)
+
+
+# Общая сессия: соединение с API переиспользуется между запросами
+SESSION = requests.Session()
+SESSION.headers.update(HEADERS)
+for prefix in ('http://', 'https://'):
+    SESSION.mount(
+        prefix,
+        KeepAliveAdapter(pool_connections=1, pool_maxsize=4, max_retries=0)
+    )
 
 
 def check_tokens() -> bool:
@@ -45,19 +159,51 @@ def check_tokens() -> bool:
 
     if missing_tokens:
         logger.critical(
-            f'Отсутствуют переменные окружения: {", ".join(missing_tokens)}.'
+            'Отсутствуют переменные окружения: %s.', ', '.join(missing_tokens)
         )
         return False
     return True
 
 
-def send_message(bot: TeleBot, message: str) -> None:
+def send_message(bot: TeleBot, message: str) -> bool:
     """Отправляет сообщение пользователю через Telegram бота."""
     try:
-        bot.send_message(TELEGRAM_CHAT_ID, message)
-        logger.debug(f'Бот отправил сообщение: "{message}"')
+        bot.send_message(TELEGRAM_CHAT_ID, message, timeout=TELEGRAM_TIMEOUT)
+        logger.debug('Бот отправил сообщение: "%s"', message)
     except Exception as e:
-        logger.error(f'Ошибка при отправке сообщения в Telegram: {e}')
+        logger.error('Ошибка при отправке сообщения в Telegram: %s', e)
+        return False
+    return True
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Возвращает задержку в секундах из заголовка `Retry-After`."""
+    if not value:
+        return None
+    if value.isdigit():
+        return float(value)
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, retry_at.timestamp() - time.time())
+
+
+def update_cache_validators(headers: Mapping[str, str]) -> None:
+    """Запоминает `ETag` и `Last-Modified` полученного ответа."""
+    _received_validators.clear()
+    etag = headers.get('ETag')
+    if etag:
+        _received_validators['If-None-Match'] = etag
+    last_modified = headers.get('Last-Modified')
+    if last_modified:
+        _received_validators['If-Modified-Since'] = last_modified
+
+
+def confirm_cache_validators() -> None:
+    """Использует валидаторы обработанного ответа в следующих запросах."""
+    _cache_validators.clear()
+    _cache_validators.update(_received_validators)
 
 
 def get_api_answer(timestamp: int) -> dict:
@@ -65,29 +211,54 @@ def get_api_answer(timestamp: int) -> dict:
     payload = {'from_date': timestamp}
 
     try:
-        response = requests.get(ENDPOINT, headers=HEADERS, params=payload)
-
-        if response.status_code != 200:
-            logger.error(
-                f'Эндпоинт {ENDPOINT} недоступен. '
-                f'Код ответа API: {response.status_code}. '
-                f'Ответ: {response.text}. '
-                f'Параметры запроса: {payload}'
-            )
-            raise Exception(f'Ошибка API: {response.status_code}')
+        response = SESSION.get(
+            ENDPOINT,
+            params=payload,
+            headers=_cache_validators,
+            timeout=API_TIMEOUT
+        )
+    except requests.RequestException as e:
+        raise TransientAPIError(
+            f'Ошибка при запросе к API: {e}. Параметры запроса: {payload}'
+        ) from e
 
+    status = response.status_code
+    if status == HTTPStatus.NOT_MODIFIED:
         logger.debug(
-            f'Успешный ответ API: {response.json()}. '
-            f'Параметры запроса: {payload}'
+            'Ответ API не изменился. Параметры запроса: %s', payload
         )
-        return response.json()
+        # 304 подтверждает валидаторы, отправленные в этом запросе
+        _received_validators.clear()
+        _received_validators.update(_cache_validators)
+        return {'homeworks': [], 'current_date': timestamp}
+    if status == HTTPStatus.OK:
+        update_cache_validators(response.headers)
+        data = json_loads(response.content)
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(
+                'Успешный ответ API: %s. Параметры запроса: %s', data, payload
+            )
+        return data
 
-    except requests.RequestException as e:
-        logger.error(
-            f'Ошибка при запросе к API: {e}. '
-            f'Параметры запроса: {payload}'
+    error_message = (
+        f'Эндпоинт {ENDPOINT} недоступен. '
+        f'Код ответа API: {status}. '
+        f'Ответ: {response.text[:API_ERROR_TEXT_LIMIT]}. '
+        f'Параметры запроса: {payload}'
+    )
+    if status in (HTTPStatus.UNAUTHORIZED, HTTPStatus.FORBIDDEN):
+        raise PermanentAPIError(
+            f'Ошибка авторизации в API. {error_message}', status
         )
-        return None
+    if status == HTTPStatus.TOO_MANY_REQUESTS:
+        raise TransientAPIError(
+            f'Превышен лимит запросов к API. {error_message}',
+            status,
+            retry_after=parse_retry_after(response.headers.get('Retry-After'))
+        )
+    if 400 <= status < 500:
+        raise PermanentAPIError(error_message, status)
+    raise TransientAPIError(error_message, status)
 
 
 def check_response(response: dict) -> list:
@@ -107,47 +278,314 @@ def parse_status(homework: dict) -> str:
     if homework_name is None:
         raise KeyError('Отсутствует ключ "homework_name".')
     status = homework.get('status')
-    if status not in HOMEWORK_VERDICTS:
+    verdict = (
+        HOMEWORK_VERDICTS.get(sys.intern(status))
+        if isinstance(status, str) else None
+    )
+    if verdict is None:
         raise ValueError(f'Неизвестный статус: {status}')
-    verdict = HOMEWORK_VERDICTS[status]
-    return f'Изменился статус проверки работы "{homework_name}". {verdict}'
+    return STATUS_MESSAGE_TEMPLATE.format(homework_name, verdict)
+
+
+def chunk_by_length(
+    messages: Iterable[str], limit: int
+) -> Iterator[list[str]]:
+    """Группирует сообщения в блоки не длиннее `limit` символов."""
+    chunk = []
+    length = 0
+    for message in messages:
+        added = len(message) + (len(MESSAGE_SEPARATOR) if chunk else 0)
+        if chunk and length + added > limit:
+            yield chunk
+            chunk = []
+            added = len(message)
+            length = 0
+        chunk.append(message)
+        length += added
+    if chunk:
+        yield chunk
+
+
+def send_chunk(bot: TeleBot, messages: list[str]) -> bool:
+    """Отправляет блок сообщений, разбивая слишком длинный текст."""
+    text = MESSAGE_SEPARATOR.join(messages)
+    return all(
+        send_message(bot, text[start:start + MESSAGE_LENGTH_LIMIT])
+        for start in range(0, len(text), MESSAGE_LENGTH_LIMIT)
+    )
+
+
+def get_homework_key(homework: dict) -> tuple:
+    """Возвращает ключ идемпотентности уведомления о статусе работы.
+
+    Вызывает `TypeError`, если работа не словарь или ключ нехешируемый.
+    """
+    if not isinstance(homework, dict):
+        raise TypeError(f'Работа должна быть словарём, получено: {homework!r}')
+    homework_id = homework.get('id', homework.get('homework_name'))
+    key = homework_id, homework.get('status'), homework.get('date_updated')
+    hash(key)
+    return key
+
+
+def restore_sent_keys(entries: list) -> None:
+    """Восстанавливает ключи отправленных уведомлений из состояния бота."""
+    for entry in entries:
+        try:
+            homework_id, status, date_updated, sent_at = entry
+            _sent_keys[(homework_id, status, date_updated)] = float(sent_at)
+        except (TypeError, ValueError):
+            logger.error('Некорректный ключ в состоянии бота: %s', entry)
+
+
+def dump_sent_keys() -> list:
+    """Возвращает ключи отправленных уведомлений для сохранения."""
+    return [[*key, sent_at] for key, sent_at in _sent_keys.items()]
+
+
+def collect_new_statuses(bot: TeleBot, homeworks: list) -> tuple[list, list]:
+    """Возвращает ещё не отправленные работы и сообщения об их статусах."""
+    parsed_homeworks = []
+    messages = []
+    for homework in homeworks:
+        try:
+            if get_homework_key(homework) in _sent_keys:
+                continue
+            messages.append(parse_status(homework))
+        except (KeyError, TypeError, ValueError) as error:
+            report_error(bot, error)
+            continue
+        parsed_homeworks.append(homework)
+    return parsed_homeworks, messages
+
+
+def send_statuses(bot: TeleBot, homeworks: list) -> tuple[bool, bool]:
+    """Отправляет пользователю ещё не отправленные статусы домашних работ.
+
+    Возвращает пару флагов: изменились ли ключи отправленных уведомлений
+    и доставлены ли все статусы, которые удалось разобрать.
+    """
+    now = time.time()
+    for key, sent_at in list(_sent_keys.items()):
+        if now - sent_at >= SENT_KEY_TTL:
+            del _sent_keys[key]
+
+    parsed_homeworks, messages = collect_new_statuses(bot, homeworks)
+    if not messages:
+        logger.debug('Отсутствие новых статусов.')
+        return False, True
+
+    keys_changed = False
+    delivered = True
+    position = 0
+    for chunk in chunk_by_length(messages, MESSAGE_LENGTH_LIMIT):
+        chunk_homeworks = parsed_homeworks[position:position + len(chunk)]
+        position += len(chunk)
+        if not send_chunk(bot, chunk):
+            delivered = False
+            continue
+        for homework in chunk_homeworks:
+            _sent_keys[get_homework_key(homework)] = now
+        keys_changed = True
+    return keys_changed, delivered
+
+
+def remember_statuses(homeworks: list) -> bool:
+    """Запоминает последнее известное состояние домашних работ."""
+    changed = False
+    for homework in homeworks:
+        try:
+            homework_id = get_homework_key(homework)[0]
+        except TypeError:
+            continue
+        if _last_known.get(homework_id) != homework:
+            _last_known[homework_id] = homework
+            changed = True
+    return changed
+
+
+def report_last_known_state(
+    bot: TeleBot, outage_started: Optional[float]
+) -> None:
+    """Сообщает последнее известное состояние работ при долгом сбое API.
+
+    Сводка отправляется один раз за сбой: повторная попытка делается,
+    только если Telegram не принял сообщение.
+    """
+    global _stale_reported_for
+    if outage_started is None or not _last_known:
+        return
+    if time.monotonic() - outage_started < STALE_THRESHOLD:
+        return
+    if _stale_reported_for == outage_started:
+        return
+    messages = ['API Практикума недоступно. Последнее известное состояние:']
+    for homework in _last_known.values():
+        try:
+            messages.append(parse_status(homework))
+        except (KeyError, TypeError, ValueError):
+            continue
+    delivered = True
+    for chunk in chunk_by_length(messages, MESSAGE_LENGTH_LIMIT):
+        delivered = send_chunk(bot, chunk) and delivered
+    if delivered:
+        _stale_reported_for = outage_started
+
+
+def load_state() -> dict:
+    """Загружает сохранённое состояние бота из файла."""
+    try:
+        state = json.loads(STATE_FILE.read_text(encoding='utf-8'))
+    except FileNotFoundError:
+        return {}
+    except (OSError, ValueError) as e:
+        logger.error('Не удалось прочитать состояние бота: %s', e)
+        return {}
+    return state if isinstance(state, dict) else {}
+
+
+def get_saved_timestamp(state: dict) -> int:
+    """Возвращает сохранённый `from_date` или текущее время."""
+    timestamp = state.get('from_date')
+    if isinstance(timestamp, int) and not isinstance(timestamp, bool):
+        return timestamp
+    if timestamp is not None:
+        logger.error('Некорректный from_date в состоянии бота: %r', timestamp)
+    return int(time.time())
+
+
+def get_saved_list(state: dict, name: str) -> list:
+    """Возвращает сохранённый список `name` или пустой список."""
+    value = state.get(name, [])
+    if isinstance(value, list):
+        return value
+    logger.error('Некорректный %s в состоянии бота: %r', name, value)
+    return []
+
+
+def save_state(state: dict) -> None:
+    """Сохраняет состояние бота в файл."""
+    tmp_file = STATE_FILE.with_name(f'{STATE_FILE.name}.tmp')
+    try:
+        tmp_file.write_text(json.dumps(state), encoding='utf-8')
+        tmp_file.replace(STATE_FILE)
+    except OSError as e:
+        logger.error('Не удалось сохранить состояние бота: %s', e)
+
+
+def get_backoff_delay(attempt: int) -> float:
+    """Вычисляет задержку перед повторным запросом после сбоя."""
+    if attempt >= MAX_RETRIES:
+        return RETRY_PERIOD
+    delay = min(MAX_DELAY, BASE_DELAY * (2 ** attempt))
+    return delay * (1 + random.uniform(0, 0.5))
+
+
+def describe_error(error: Exception) -> str:
+    """Формирует текст сообщения об ошибке в работе бота."""
+    if isinstance(error, TypeError):
+        return f'Ошибка типа: {error}'
+    if isinstance(error, KeyError):
+        return f'Отсутствует ключ в ответе: {error}'
+    if isinstance(error, ValueError):
+        return f'Некорректные данные в ответе: {error}'
+    if isinstance(error, PermanentAPIError):
+        return f'Работа бота остановлена: {error}'
+    return f'Сбой в работе программы: {error}'
+
+
+def should_notify(signature: str) -> bool:
+    """Проверяет, нужно ли уведомлять пользователя об ошибке."""
+    now = time.monotonic()
+    for cached, sent_at in list(_error_cache.items()):
+        if now - sent_at >= ERROR_TTL:
+            del _error_cache[cached]
+    if signature in _error_cache:
+        return False
+    _error_cache[signature] = now
+    return True
+
+
+def get_error_signature(error: Exception) -> str:
+    """Возвращает признак ошибки для подавления повторных уведомлений.
+
+    Текст ошибок API содержит ответ сервера и описание исключения
+    `requests`, которые меняются от запроса к запросу, поэтому для них
+    используются только код ответа и тип исходного исключения.
+    """
+    if isinstance(error, APIError):
+        parts = [type(error).__name__]
+        if error.status is not None:
+            parts.append(str(int(error.status)))
+        if error.__cause__ is not None:
+            parts.append(type(error.__cause__).__name__)
+        return ':'.join(parts)
+    return f'{type(error).__name__}:{error}'
+
+
+def report_error(
+    bot: TeleBot, error: Exception, level: int = logging.ERROR
+) -> None:
+    """Логирует ошибку и сообщает о ней в Telegram без повторов."""
+    message = describe_error(error)
+    logger.log(level, message)
+    if should_notify(get_error_signature(error)):
+        send_message(bot, message)
 
 
 def main() -> None:
     """Основная логика работы бота."""
-    global last_error
     if not check_tokens():
-        return
+        sys.exit(1)
 
     bot = TeleBot(token=TELEGRAM_TOKEN)
-    timestamp = int(time.time())
+    state = load_state()
+    timestamp = get_saved_timestamp(state)
+    restore_sent_keys(get_saved_list(state, 'sent_keys'))
+    remember_statuses(get_saved_list(state, 'last_known'))
+    attempt = 0
+    outage_started = None
 
     logger.info('Бот запущен и работает.')
 
     while True:
+        delay = RETRY_PERIOD
         try:
             logger.info('Запрос к API...')
             response = get_api_answer(timestamp)
-            if response is None:
-                continue
+            attempt = 0
+            outage_started = None
 
             homeworks = check_response(response)
-            if homeworks:
-                for homework in homeworks:
-                    message = parse_status(homework)
-                    send_message(bot, message)
-            else:
-                logger.debug('Отсутствие новых статусов.')
-
-            timestamp = response.get('current_date', timestamp)
-
-        except (TypeError, KeyError, Exception) as error:
-            if isinstance(error, TypeError):
-                message = f'Ошибка типа: {error}'
-            elif isinstance(error, KeyError):
-                message = f'Отсутствует ключ в ответе: {error}'
-            else:
-                message = f'Сбой в работе программы: {error}'
-
-        finally:
-            time.sleep(RETRY_PERIOD)
+            keys_changed, delivered = send_statuses(bot, homeworks)
+            known_changed = remember_statuses(homeworks)
+
+            # Пока статусы не доставлены, from_date не сдвигается, чтобы
+            # следующий запрос вернул их снова
+            current_date = timestamp
+            if delivered:
+                current_date = response.get('current_date', timestamp)
+                confirm_cache_validators()
+            if current_date != timestamp or keys_changed or known_changed:
+                timestamp = state['from_date'] = current_date
+                state['sent_keys'] = dump_sent_keys()
+                state['last_known'] = list(_last_known.values())
+                save_state(state)
+
+        except PermanentAPIError as error:
+            report_error(bot, error, logging.CRITICAL)
+            sys.exit(1)
+
+        except TransientAPIError as error:
+            report_error(bot, error)
+            delay = max(get_backoff_delay(attempt), error.retry_after or 0)
+            attempt += 1
+            outage_started = outage_started or time.monotonic()
+            report_last_known_state(bot, outage_started)
+
+        except Exception as error:
+            # Повтор запроса не исправит некорректные данные в ответе,
+            # поэтому ошибки разбора ждут обычного RETRY_PERIOD
+            report_error(bot, error)
+
+        time.sleep(delay)
@@ -1,3 +1,4 @@
+import json
 import logging
 import signal
 import re
@@ -85,12 +86,13 @@ class MockResponseGET:
 
     def __init__(
             self, *args, random_timestamp=None, http_status=HTTPStatus.OK,
-            data=None, **kwargs
+            data=None, response_headers=None, **kwargs
     ):
         self.random_timestamp = random_timestamp
         self.status_code = http_status
         self.reason = ''
         self.text = ''
+        self.headers = response_headers or {}
         default_data = {
             'homeworks': [],
             'current_date': self.random_timestamp
@@ -101,6 +103,10 @@ class MockResponseGET:
     def json(self):
         return self.data
 
+    @property
+    def content(self):
+        return json.dumps(self.data).encode()
+
     def raise_for_status(self):
         if self.status_code >= 400:
             raise ValueError('Server or client error.')
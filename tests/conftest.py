@@ -1,5 +1,6 @@
 import os
 import sys
+import tempfile
 
 import pytest_timeout
 
@@ -53,3 +54,7 @@ pytest_timeout.write = write_timeout_reasons
 os.environ['PRACTICUM_TOKEN'] = 'sometoken'
 os.environ['TELEGRAM_TOKEN'] = '1234:abcdefg'
 os.environ['TELEGRAM_CHAT_ID'] = '12345'
+os.environ['LOG_LEVEL'] = 'DEBUG'
+os.environ['HOMEWORK_BOT_STATE'] = os.path.join(
+    tempfile.mkdtemp(), 'homework_bot_state'
+)
@@ -1,7 +1,10 @@
+import atexit
+import importlib.util
 import inspect
 import logging
 import platform
 import re
+import socket
 import time
 from http import HTTPStatus
 
@@ -156,6 +159,46 @@ class TestHomework:
             '(`logging.getLogger()`).'
         )
 
+    def test_invalid_log_level_falls_back_to_info(
+            self, monkeypatch, homework_module
+    ):
+        monkeypatch.setenv('LOG_LEVEL', 'verbose')
+        spec = importlib.util.spec_from_file_location(
+            'homework_invalid_log_level', homework_module.__file__
+        )
+        module = importlib.util.module_from_spec(spec)
+        try:
+            spec.loader.exec_module(module)
+        except ValueError as e:
+            raise AssertionError(
+                'Убедитесь, что неизвестное значение `LOG_LEVEL` не '
+                'останавливает бота.'
+            ) from e
+        atexit.unregister(module.log_listener.stop)
+        module.log_listener.stop()
+        assert module.logger.level == logging.INFO, (
+            'Убедитесь, что при неизвестном значении `LOG_LEVEL` '
+            'используется уровень `INFO`.'
+        )
+
+    def test_session_keep_alive_adapter(self, homework_module):
+        adapter = homework_module.SESSION.get_adapter(homework_module.ENDPOINT)
+        assert isinstance(adapter, homework_module.KeepAliveAdapter), (
+            'Убедитесь, что для запросов к API используется '
+            '`KeepAliveAdapter`.'
+        )
+        socket_options = adapter.poolmanager.connection_pool_kw.get(
+            'socket_options', []
+        )
+        for option in (
+            (socket.IPPROTO_TCP, socket.TCP_NODELAY, 1),
+            (socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1),
+        ):
+            assert option in socket_options, (
+                'Убедитесь, что на соединениях с API включены '
+                '`TCP_NODELAY` и `SO_KEEPALIVE`.'
+            )
+
     def test_request_call(
             self, monkeypatch, current_timestamp, homework_module
     ):
@@ -175,14 +218,15 @@ class TestHomework:
             assert url.startswith(expected_url), (
                 'Проверьте адрес, на который отправляются запросы.'
             )
-            assert 'headers' in kwargs, (
-                'Проверьте, что в запрос к API передан заголовок.'
-            )
-            assert 'Authorization' in kwargs['headers'], (
+            headers = {
+                **homework_module.SESSION.headers,
+                **kwargs.get('headers', {})
+            }
+            assert 'Authorization' in headers, (
                 'Проверьте, что в заголовках запроса передано поле '
                 '`Authorization`.'
             )
-            assert kwargs['headers']['Authorization'].startswith('OAuth '), (
+            assert headers['Authorization'].startswith('OAuth '), (
                 'Проверьте, что заголовок `Authorization` '
                 'начинается с `OAuth`.'
             )
@@ -203,7 +247,9 @@ class TestHomework:
                     'Проверьте, что в параметре `from_date` передано число.'
                 )
 
-        monkeypatch.setattr(requests, 'get', check_request_call)
+        monkeypatch.setattr(
+            homework_module.SESSION, 'get', check_request_call
+        )
         try:
             homework_module.get_api_answer(current_timestamp)
         except AssertionError:
@@ -228,7 +274,9 @@ class TestHomework:
                 current_timestamp=current_timestamp, **kwargs
             )
 
-        monkeypatch.setattr(requests, 'get', mock_response_get)
+        monkeypatch.setattr(
+            homework_module.SESSION, 'get', mock_response_get
+        )
 
         result = homework_module.get_api_answer(current_timestamp)
         assert isinstance(result, dict), (
@@ -246,7 +294,9 @@ class TestHomework:
             self.HOMEWORK_FUNC_WITH_PARAMS_QTY[func_name]
         )
 
-        monkeypatch.setattr(requests, 'get', response)
+        monkeypatch.setattr(
+            homework_module.SESSION, 'get', response
+        )
         try:
             homework_module.get_api_answer(current_timestamp)
         except Exception:
@@ -270,7 +320,9 @@ class TestHomework:
         def mock_request_get_with_exception(*args, **kwargs):
             raise requests.RequestException('Something wrong')
 
-        monkeypatch.setattr(requests, 'get', mock_request_get_with_exception)
+        monkeypatch.setattr(
+            homework_module.SESSION, 'get', mock_request_get_with_exception
+        )
         try:
             homework_module.get_api_answer(current_timestamp)
         except requests.RequestException as e:
@@ -282,6 +334,72 @@ class TestHomework:
         except Exception:
             pass
 
+    @pytest.mark.parametrize('http_status, error_name', (
+        (HTTPStatus.UNAUTHORIZED, 'PermanentAPIError'),
+        (HTTPStatus.NOT_FOUND, 'PermanentAPIError'),
+        (HTTPStatus.INTERNAL_SERVER_ERROR, 'TransientAPIError'),
+        (HTTPStatus.TOO_MANY_REQUESTS, 'TransientAPIError'),
+    ))
+    def test_get_api_answer_classifies_errors(
+            self, monkeypatch, current_timestamp, http_status, error_name,
+            homework_module
+    ):
+        def mock_response_get(*args, **kwargs):
+            return check_utils.MockResponseGET(
+                *args, http_status=http_status, data={},
+                response_headers={'Retry-After': '120'}, **kwargs
+            )
+
+        monkeypatch.setattr(
+            homework_module.SESSION, 'get', mock_response_get
+        )
+        error_class = getattr(homework_module, error_name)
+        with pytest.raises(error_class) as exc_info:
+            homework_module.get_api_answer(current_timestamp)
+        if http_status == HTTPStatus.TOO_MANY_REQUESTS:
+            assert exc_info.value.retry_after == 120, (
+                'Убедитесь, что при ответе 429 учитывается заголовок '
+                '`Retry-After`.'
+            )
+
+    def test_get_api_answer_conditional_request(
+            self, monkeypatch, random_timestamp, current_timestamp,
+            homework_module
+    ):
+        monkeypatch.setattr(homework_module, '_cache_validators', {})
+        monkeypatch.setattr(homework_module, '_received_validators', {})
+        sent_headers = []
+
+        def mock_response_get(*args, headers=None, **kwargs):
+            sent_headers.append(dict(headers or {}))
+            if len(sent_headers) == 1:
+                return check_utils.MockResponseGET(
+                    *args, random_timestamp=random_timestamp,
+                    response_headers={'ETag': '"v1"'}, **kwargs
+                )
+            return check_utils.MockResponseGET(
+                *args, http_status=HTTPStatus.NOT_MODIFIED,
+                data={'unexpected': 'body'}, **kwargs
+            )
+
+        monkeypatch.setattr(
+            homework_module.SESSION, 'get', mock_response_get
+        )
+        homework_module.get_api_answer(current_timestamp)
+        homework_module.confirm_cache_validators()
+        result = homework_module.get_api_answer(current_timestamp)
+
+        assert sent_headers[1].get('If-None-Match') == '"v1"', (
+            'Убедитесь, что в запрос передаётся заголовок `If-None-Match` '
+            'с `ETag` предыдущего ответа.'
+        )
+        assert result == {
+            'homeworks': [], 'current_date': current_timestamp
+        }, (
+            'Убедитесь, что при ответе 304 функция `get_api_answer` '
+            'возвращает пустой список домашних работ.'
+        )
+
     def test_parse_status_with_expected_statuses(self, homework_module):
         func_name = 'parse_status'
         check_utils.check_function(
@@ -357,6 +475,13 @@ class TestHomework:
                     'статус домашней работы либо домашку без статуса.'
                 )
 
+    def test_parse_status_with_non_string_status(self, homework_module):
+        for status in ([], {}, 1):
+            with pytest.raises(ValueError):
+                homework_module.parse_status(
+                    {'homework_name': 'x', 'status': status}
+                )
+
     def test_parse_status_no_homework_name_key(self, homework_module):
         homework_with_invalid_name = {
             'status': 'approved'
@@ -523,7 +648,7 @@ class TestHomework:
         )
 
     def mock_main(
-            self, monkeypatch, random_message, random_timestamp,
+            self, monkeypatch, tmp_path, random_message, random_timestamp,
             current_timestamp, homework_module, mock_bot=True,
             response_data=None
     ):
@@ -531,6 +656,10 @@ class TestHomework:
         Mock all functions inside main() which need environment vars to work
         correctly.
         """
+        monkeypatch.setattr(homework_module, 'STATE_FILE', tmp_path / 'state')
+        monkeypatch.setattr(homework_module, '_sent_keys', {})
+        monkeypatch.setattr(homework_module, '_last_known', {})
+        monkeypatch.setattr(homework_module, '_error_cache', {})
         monkeypatch.setattr(homework_module, 'PRACTICUM_TOKEN', 'sometoken')
         monkeypatch.setattr(homework_module, 'TELEGRAM_TOKEN', '1234:abcdefg')
         monkeypatch.setattr(homework_module, 'TELEGRAM_CHAT_ID', '12345')
@@ -595,7 +724,7 @@ class TestHomework:
                 data=response_data
             ))
         monkeypatch.setattr(
-            requests,
+            homework_module.SESSION,
             'get',
             mock_response_get_with_new_status
         )
@@ -606,10 +735,11 @@ class TestHomework:
 
     def test_main_without_env_vars_raise_exception(
             self, caplog, monkeypatch, random_timestamp, current_timestamp,
-            random_message, homework_module
+            random_message, tmp_path, homework_module
     ):
         self.mock_main(
             monkeypatch,
+            tmp_path,
             random_message,
             random_timestamp,
             current_timestamp,
@@ -637,10 +767,11 @@ class TestHomework:
 
     def test_main_send_request_to_api(
             self, monkeypatch, random_timestamp, current_timestamp,
-            random_message, caplog, homework_module
+            random_message, caplog, tmp_path, homework_module
     ):
         self.mock_main(
             monkeypatch,
+            tmp_path,
             random_message,
             random_timestamp,
             current_timestamp,
@@ -658,16 +789,17 @@ class TestHomework:
                     )
                 ]
                 assert log_record, (
-                    'Убедитесь, что бот использует функцию `requests.get()` '
+                    'Убедитесь, что бот использует метод `SESSION.get()` '
                     'для отправки запроса к API домашки.'
                 )
 
     def test_main_check_response_is_called(
             self, monkeypatch, random_timestamp, current_timestamp,
-            random_message, caplog, homework_module
+            random_message, caplog, tmp_path, homework_module
     ):
         self.mock_main(
             monkeypatch,
+            tmp_path,
             random_message,
             random_timestamp,
             current_timestamp,
@@ -712,10 +844,12 @@ class TestHomework:
 
     def test_main_send_message_with_new_status(
             self, monkeypatch, random_timestamp, current_timestamp,
-            random_message, caplog, homework_module, data_with_new_hw_status
+            random_message, caplog, tmp_path, homework_module,
+            data_with_new_hw_status
     ):
         self.mock_main(
             monkeypatch,
+            tmp_path,
             random_message,
             random_timestamp,
             current_timestamp,
@@ -753,10 +887,11 @@ class TestHomework:
 
     def test_main_log_response_whithout_homeworks(
             self, monkeypatch, random_timestamp, current_timestamp,
-            random_message, caplog, homework_module
+            random_message, caplog, tmp_path, homework_module
     ):
         self.mock_main(
             monkeypatch,
+            tmp_path,
             random_message,
             random_timestamp,
             current_timestamp,
@@ -782,10 +917,12 @@ class TestHomework:
 
     def test_main_send_message_with_telegram_exception(
             self, monkeypatch, random_timestamp, current_timestamp,
-            random_message, caplog, homework_module, data_with_new_hw_status
+            random_message, caplog, tmp_path, homework_module,
+            data_with_new_hw_status
     ):
         self.mock_main(
             monkeypatch,
+            tmp_path,
             random_message,
             random_timestamp,
             current_timestamp,
@@ -822,6 +959,488 @@ class TestHomework:
                     'возникновении ошибки отправки сообщения в Телеграм.'
                 ) from e
 
+    def test_backoff_delay(self, homework_module):
+        func_name = 'get_backoff_delay'
+        check_utils.check_function(homework_module, func_name, 1)
+
+        base_delay = homework_module.BASE_DELAY
+        max_delay = homework_module.MAX_DELAY
+        first_delay = homework_module.get_backoff_delay(0)
+        assert base_delay <= first_delay <= base_delay * 1.5, (
+            'Убедитесь, что первая задержка после сбоя близка к '
+            '`BASE_DELAY`.'
+        )
+        for attempt in range(1, homework_module.MAX_RETRIES):
+            delay = homework_module.get_backoff_delay(attempt)
+            assert delay <= max_delay * 1.5, (
+                'Убедитесь, что задержка после сбоя ограничена `MAX_DELAY`.'
+            )
+        retries_exhausted_delay = homework_module.get_backoff_delay(
+            homework_module.MAX_RETRIES
+        )
+        assert retries_exhausted_delay == self.RETRY_PERIOD, (
+            'Убедитесь, что после `MAX_RETRIES` сбоев подряд бот '
+            'возвращается к периоду `RETRY_PERIOD`.'
+        )
+
+    def test_error_notification_deduplicated(
+            self, monkeypatch, homework_module
+    ):
+        func_name = 'should_notify'
+        check_utils.check_function(homework_module, func_name, 1)
+        monkeypatch.setattr(homework_module, '_error_cache', {})
+
+        assert homework_module.should_notify('ValueError:first'), (
+            'Убедитесь, что о новой ошибке бот сообщает в Telegram.'
+        )
+        assert homework_module.should_notify('ValueError:second'), (
+            'Убедитесь, что о новой ошибке бот сообщает в Telegram.'
+        )
+        assert not homework_module.should_notify('ValueError:first'), (
+            'Убедитесь, что о повторяющейся ошибке бот не сообщает '
+            'чаще, чем раз в `ERROR_TTL` секунд.'
+        )
+
+        expired = time.monotonic() - homework_module.ERROR_TTL - 1
+        homework_module._error_cache['ValueError:first'] = expired
+        assert homework_module.should_notify('ValueError:first'), (
+            'Убедитесь, что по истечении `ERROR_TTL` бот снова сообщает '
+            'об ошибке.'
+        )
+
+    def test_send_statuses_skips_already_sent(
+            self, monkeypatch, data_with_new_hw_status, homework_module
+    ):
+        func_name = 'send_statuses'
+        check_utils.check_function(homework_module, func_name, 2)
+        monkeypatch.setattr(homework_module, '_sent_keys', {})
+        sent_messages = []
+
+        def mock_send_message(bot, message=''):
+            sent_messages.append(message)
+            return True
+
+        monkeypatch.setattr(
+            homework_module, 'send_message', mock_send_message
+        )
+        homeworks = data_with_new_hw_status['homeworks']
+
+        assert homework_module.send_statuses(None, homeworks) == (
+            True, True
+        ), (
+            f'Убедитесь, что функция `{func_name}` сообщает о новых '
+            'отправленных статусах.'
+        )
+        assert homework_module.send_statuses(None, homeworks) == (
+            False, True
+        ), (
+            f'Убедитесь, что функция `{func_name}` не отправляет '
+            'повторно уже отправленный статус.'
+        )
+        assert len(sent_messages) == 1, (
+            'Убедитесь, что уведомление о статусе работы отправляется '
+            'только один раз.'
+        )
+
+        saved = homework_module.dump_sent_keys()
+        monkeypatch.setattr(homework_module, '_sent_keys', {})
+        homework_module.restore_sent_keys(saved)
+        homework_module.send_statuses(None, homeworks)
+        assert len(sent_messages) == 1, (
+            'Убедитесь, что ключи отправленных статусов восстанавливаются '
+            'из состояния бота.'
+        )
+
+    def test_send_statuses_resubmission_cycle(
+            self, monkeypatch, homework_module
+    ):
+        monkeypatch.setattr(homework_module, '_sent_keys', {})
+        sent_messages = []
+
+        def mock_send_message(bot, message=''):
+            sent_messages.append(message)
+            return True
+
+        monkeypatch.setattr(
+            homework_module, 'send_message', mock_send_message
+        )
+        statuses = ('reviewing', 'rejected', 'reviewing', 'approved')
+        for hour, status in enumerate(statuses, start=10):
+            homework_module.send_statuses(None, [{
+                'id': 1,
+                'homework_name': 'hw.zip',
+                'status': status,
+                'date_updated': f'2021-04-11T{hour}:00:00Z'
+            }])
+        assert len(sent_messages) == len(statuses), (
+            'Убедитесь, что повторное изменение статуса после '
+            'пересдачи работы тоже отправляется в Telegram.'
+        )
+
+    def test_send_statuses_partial_delivery(
+            self, monkeypatch, homework_module
+    ):
+        monkeypatch.setattr(homework_module, '_sent_keys', {})
+        monkeypatch.setattr(homework_module, 'MESSAGE_LENGTH_LIMIT', 100)
+        sent_messages = []
+
+        def mock_send_message(bot, message=''):
+            sent_messages.append(message)
+            return 'hw2' not in message
+
+        monkeypatch.setattr(
+            homework_module, 'send_message', mock_send_message
+        )
+        homeworks = [
+            {'id': 1, 'homework_name': 'hw1', 'status': 'approved'},
+            {'id': 2, 'homework_name': 'hw2', 'status': 'approved'},
+        ]
+        assert homework_module.send_statuses(None, homeworks) == (
+            True, False
+        ), (
+            'Убедитесь, что при частичной доставке функция '
+            '`send_statuses` сообщает, что не все статусы доставлены.'
+        )
+        sent_messages.clear()
+        homework_module.send_statuses(None, homeworks)
+        assert all('hw1' not in message for message in sent_messages), (
+            'Убедитесь, что при повторной попытке не отправляются статусы, '
+            'которые уже были доставлены.'
+        )
+        assert any('hw2' in message for message in sent_messages), (
+            'Убедитесь, что недоставленный статус отправляется повторно.'
+        )
+
+    def test_main_retries_undelivered_status_despite_etag(
+            self, monkeypatch, random_timestamp, current_timestamp,
+            random_message, data_with_new_hw_status, tmp_path,
+            homework_module
+    ):
+        self.mock_main(
+            monkeypatch,
+            tmp_path,
+            random_message,
+            random_timestamp,
+            current_timestamp,
+            homework_module,
+            response_data=data_with_new_hw_status
+        )
+        monkeypatch.setattr(homework_module, '_cache_validators', {})
+        monkeypatch.setattr(homework_module, '_received_validators', {})
+
+        def mock_response_get(*args, headers=None, **kwargs):
+            if (headers or {}).get('If-None-Match') == '"v1"':
+                return check_utils.MockResponseGET(
+                    *args, http_status=HTTPStatus.NOT_MODIFIED, **kwargs
+                )
+            return check_utils.MockResponseGET(
+                *args, data=data_with_new_hw_status,
+                response_headers={'ETag': '"v1"'}, **kwargs
+            )
+
+        send_results = iter((False, True))
+        sent_messages = []
+
+        def mock_send_message(bot, message=''):
+            sent_messages.append(message)
+            return next(send_results)
+
+        polls = []
+
+        def sleep_until_second_poll(secs):
+            polls.append(secs)
+            if len(polls) == 2:
+                raise check_utils.BreakInfiniteLoop('break')
+
+        monkeypatch.setattr(
+            homework_module.SESSION, 'get', mock_response_get
+        )
+        monkeypatch.setattr(
+            homework_module, 'send_message', mock_send_message
+        )
+        monkeypatch.setattr(time, 'sleep', sleep_until_second_poll)
+        try:
+            homework_module.main()
+        except check_utils.BreakInfiniteLoop:
+            pass
+        assert len(sent_messages) == 2, (
+            'Убедитесь, что недоставленный статус отправляется повторно, '
+            'даже если API поддерживает условные запросы.'
+        )
+
+    def test_main_keeps_from_date_until_delivered(
+            self, monkeypatch, random_timestamp, current_timestamp,
+            random_message, data_with_new_hw_status, tmp_path,
+            homework_module
+    ):
+        self.mock_main(
+            monkeypatch,
+            tmp_path,
+            random_message,
+            random_timestamp,
+            current_timestamp,
+            homework_module,
+            response_data=data_with_new_hw_status
+        )
+        monkeypatch.setattr(
+            homework_module, 'send_message', lambda bot, message: False
+        )
+        try:
+            homework_module.main()
+        except check_utils.BreakInfiniteLoop:
+            pass
+        saved_from_date = homework_module.load_state().get('from_date')
+        assert saved_from_date != data_with_new_hw_status['current_date'], (
+            'Убедитесь, что `from_date` не сдвигается, пока новые статусы '
+            'не доставлены в Telegram.'
+        )
+
+    def test_report_last_known_state(
+            self, monkeypatch, data_with_new_hw_status, homework_module
+    ):
+        func_name = 'report_last_known_state'
+        check_utils.check_function(homework_module, func_name, 2)
+        monkeypatch.setattr(homework_module, '_last_known', {})
+        monkeypatch.setattr(homework_module, '_error_cache', {})
+        monkeypatch.setattr(homework_module, '_stale_reported_for', None)
+        monkeypatch.setattr(homework_module, 'ERROR_TTL', 0)
+        sent_messages = []
+
+        def mock_send_message(bot, message=''):
+            sent_messages.append(message)
+            return True
+
+        monkeypatch.setattr(
+            homework_module, 'send_message', mock_send_message
+        )
+        homework_module.remember_statuses(data_with_new_hw_status['homeworks'])
+
+        homework_module.report_last_known_state(None, time.monotonic())
+        assert not sent_messages, (
+            'Убедитесь, что при коротком сбое API бот не отправляет '
+            'последнее известное состояние работ.'
+        )
+
+        outage_started = (
+            time.monotonic() - homework_module.STALE_THRESHOLD - 1
+        )
+        homework_module.report_last_known_state(None, outage_started)
+        homework_module.report_last_known_state(None, outage_started)
+        hw_name = data_with_new_hw_status['homeworks'][0]['homework_name']
+        assert len(sent_messages) == 1 and hw_name in sent_messages[0], (
+            'Убедитесь, что при долгом сбое API бот один раз отправляет '
+            'последнее известное состояние работ.'
+        )
+
+        homework_module.report_last_known_state(None, outage_started - 1)
+        assert len(sent_messages) == 2, (
+            'Убедитесь, что о новом сбое API бот снова отправляет '
+            'последнее известное состояние работ.'
+        )
+
+    def test_send_statuses_skips_broken_homework(
+            self, monkeypatch, data_with_new_hw_status, homework_module
+    ):
+        monkeypatch.setattr(homework_module, '_sent_keys', {})
+        monkeypatch.setattr(homework_module, '_error_cache', {})
+        sent_messages = []
+
+        def mock_send_message(bot, message=''):
+            sent_messages.append(message)
+            return True
+
+        monkeypatch.setattr(
+            homework_module, 'send_message', mock_send_message
+        )
+        valid_homework = data_with_new_hw_status['homeworks'][0]
+        broken_homework = {
+            'id': 1, 'homework_name': 'hw_broken', 'status': 'unknown'
+        }
+        homework_module.send_statuses(None, [broken_homework, valid_homework])
+
+        assert any(
+            valid_homework['homework_name'] in message
+            for message in sent_messages
+        ), (
+            'Убедитесь, что работа с некорректным статусом не мешает '
+            'отправке остальных статусов.'
+        )
+        assert any('unknown' in message for message in sent_messages), (
+            'Убедитесь, что об ошибке разбора статуса бот сообщает '
+            'в Telegram.'
+        )
+
+    def test_chunk_by_length(self, homework_module):
+        func_name = 'chunk_by_length'
+        check_utils.check_function(homework_module, func_name, 2)
+
+        messages = ['a' * 4, 'b' * 4, 'c' * 4, 'd' * 25]
+        chunks = list(homework_module.chunk_by_length(messages, 10))
+        expected = [['a' * 4, 'b' * 4], ['c' * 4], ['d' * 25]]
+        assert chunks == expected, (
+            f'Убедитесь, что функция `{func_name}` объединяет сообщения '
+            'в блоки, не превышающие заданной длины.'
+        )
+
+    def test_send_chunk_splits_long_text(self, monkeypatch, homework_module):
+        sent_messages = []
+
+        def mock_send_message(bot, message=''):
+            sent_messages.append(message)
+            return True
+
+        monkeypatch.setattr(
+            homework_module, 'send_message', mock_send_message
+        )
+        monkeypatch.setattr(homework_module, 'MESSAGE_LENGTH_LIMIT', 10)
+        assert homework_module.send_chunk(None, ['d' * 25])
+        assert sent_messages == ['d' * 10, 'd' * 10, 'd' * 5], (
+            'Убедитесь, что слишком длинное сообщение разбивается на части '
+            'не длиннее `MESSAGE_LENGTH_LIMIT`.'
+        )
+
+    def test_state_persisted(self, monkeypatch, tmp_path, homework_module):
+        state_file = tmp_path / 'state'
+        monkeypatch.setattr(homework_module, 'STATE_FILE', state_file)
+
+        assert homework_module.load_state() == {}, (
+            'Убедитесь, что при отсутствии файла состояния бот '
+            'начинает с пустого состояния.'
+        )
+        homework_module.save_state({'from_date': 1000198000})
+        assert homework_module.load_state() == {'from_date': 1000198000}, (
+            'Убедитесь, что сохранённый `from_date` восстанавливается '
+            'при перезапуске бота.'
+        )
+        for invalid_from_date in ('1000198000', 1.5, True, None):
+            homework_module.save_state({'from_date': invalid_from_date})
+            timestamp = homework_module.get_saved_timestamp(
+                homework_module.load_state()
+            )
+            assert isinstance(timestamp, int) and timestamp > 1000198000, (
+                'Убедитесь, что при некорректном `from_date` в файле '
+                'состояния бот начинает с текущего времени.'
+            )
+        state_file.write_text('not json')
+        assert homework_module.load_state() == {}, (
+            'Убедитесь, что повреждённый файл состояния не останавливает '
+            'бота.'
+        )
+
+    def test_invalid_saved_lists_ignored(
+            self, monkeypatch, tmp_path, homework_module
+    ):
+        monkeypatch.setattr(homework_module, '_sent_keys', {})
+        monkeypatch.setattr(homework_module, '_last_known', {})
+        for value in (5, 'sent', {'a': 1}, None):
+            state = {'sent_keys': value, 'last_known': value}
+            saved_keys = homework_module.get_saved_list(state, 'sent_keys')
+            saved_known = homework_module.get_saved_list(state, 'last_known')
+            assert saved_keys == [] and saved_known == [], (
+                'Убедитесь, что некорректные `sent_keys` и `last_known` в '
+                'файле состояния не останавливают бота.'
+            )
+            homework_module.restore_sent_keys(saved_keys)
+            homework_module.remember_statuses(saved_known)
+
+    def test_unhashable_homework_id_skipped(
+            self, monkeypatch, homework_module
+    ):
+        monkeypatch.setattr(homework_module, '_sent_keys', {})
+        monkeypatch.setattr(homework_module, '_last_known', {})
+        monkeypatch.setattr(homework_module, '_error_cache', {})
+        sent_messages = []
+
+        def mock_send_message(bot, message=''):
+            sent_messages.append(message)
+            return True
+
+        monkeypatch.setattr(
+            homework_module, 'send_message', mock_send_message
+        )
+        homeworks = [
+            {'id': [1], 'homework_name': 'bad', 'status': 'approved'},
+            {'id': 2, 'homework_name': 'good', 'status': 'approved'},
+            'not a homework',
+        ]
+        keys_changed, delivered = homework_module.send_statuses(
+            None, homeworks
+        )
+        assert keys_changed and delivered, (
+            'Убедитесь, что работа с нехешируемым `id` не мешает отправке '
+            'остальных статусов.'
+        )
+        assert list(homework_module._sent_keys) == [(2, 'approved', None)], (
+            'Убедитесь, что ключ отправленного уведомления сохраняется '
+            'только для корректных работ.'
+        )
+        assert homework_module.remember_statuses(homeworks)
+        assert list(homework_module._last_known) == [2]
+
+    def test_main_logs_permanent_error_once(
+            self, monkeypatch, random_timestamp, current_timestamp,
+            random_message, caplog, tmp_path, homework_module
+    ):
+        self.mock_main(
+            monkeypatch,
+            tmp_path,
+            random_message,
+            random_timestamp,
+            current_timestamp,
+            homework_module
+        )
+        monkeypatch.setattr(homework_module, '_error_cache', {})
+        monkeypatch.setattr(
+            homework_module.SESSION, 'get', self.NOT_OK_RESPONSES[401]
+        )
+        with caplog.at_level(logging.DEBUG):
+            with pytest.raises(SystemExit):
+                homework_module.main()
+        error_records = [
+            record for record in caplog.records
+            if record.name == homework_module.__name__
+            and record.levelno >= logging.ERROR
+        ]
+        assert len(error_records) == 1, (
+            'Убедитесь, что ошибка API логируется один раз.'
+        )
+        assert error_records[0].levelno == logging.CRITICAL, (
+            'Убедитесь, что ошибка авторизации в API логируется с уровнем '
+            '`CRITICAL`.'
+        )
+
+    def test_error_signature_ignores_volatile_text(self, homework_module):
+        errors = []
+        for address in ('0x7f01', '0x7f02'):
+            try:
+                try:
+                    raise requests.ConnectionError(
+                        f'<HTTPSConnection object at {address}>'
+                    )
+                except requests.ConnectionError as e:
+                    raise homework_module.TransientAPIError(
+                        f'Ошибка при запросе к API: {e}'
+                    ) from e
+            except homework_module.TransientAPIError as error:
+                errors.append(error)
+        errors.extend(
+            homework_module.TransientAPIError(f'Ответ: {body}', 503)
+            for body in ('request id 1', 'request id 2')
+        )
+        signatures = [
+            homework_module.get_error_signature(error) for error in errors
+        ]
+        assert signatures[0] == signatures[1], (
+            'Убедитесь, что признак сетевой ошибки не зависит от текста '
+            'исключения.'
+        )
+        assert signatures[2] == signatures[3], (
+            'Убедитесь, что признак ошибки API не зависит от тела ответа.'
+        )
+        assert signatures[0] != signatures[2], (
+            'Убедитесь, что разные ошибки API различаются по признаку.'
+        )
+
     def test_docstrings(self, homework_module):
         for func in self.HOMEWORK_FUNC_WITH_PARAMS_QTY:
             check_utils.check_docstring(homework_module, func)